@@ -89,6 +89,10 @@ class TransportConfig(BaseModel):
     enable_batching: bool = True
     batch_timeout: float = 0.1
     max_batch_size: int = 50
+    max_request_size: int = 1024 * 1024  # 1 MiB request body ceiling
+    event_history_size: int = 100  # replayable events kept per client
+    max_sessions: int = 1000  # LRU-evicted session capacity
+    client_queue_size: int = 256  # outgoing events buffered per client
 
 
 class HDF5Config(BaseModel):
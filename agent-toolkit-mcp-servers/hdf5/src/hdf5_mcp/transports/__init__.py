@@ -0,0 +1,15 @@
+"""Transport implementations for the HDF5 MCP server."""
+
+from .sse_transport import (
+    SSEClient,
+    SessionInfo,
+    SSETransport,
+    install_optimized_event_loop,
+)
+
+__all__ = [
+    "SSEClient",
+    "SessionInfo",
+    "SSETransport",
+    "install_optimized_event_loop",
+]
@@ -0,0 +1,927 @@
+"""
+HDF5 FastMCP SSE/HTTP Transport
+
+@file       sse_transport.py
+@brief      SSE/HTTP transport with session management and resumable streams
+@author     IoWarp Scientific MCPs Team
+@version    2.1.0
+@date       2025
+@license    MIT
+
+@description
+    Part of the IoWarp MCP Server Collection for AI-powered scientific computing.
+
+    This module implements the SSE (Server-Sent Events) transport for the HDF5
+    MCP server, following the MCP Streamable HTTP specification (2025-06-18).
+    A single /mcp endpoint accepts JSON-RPC messages via POST and streams
+    server-to-client messages via GET.
+
+    Key Features:
+    - Single MCP endpoint (POST + GET + DELETE)
+    - Session management (Mcp-Session-Id header)
+    - Resumable streams (Last-Event-ID header, per-client event history)
+    - Origin validation (anti-DNS-rebinding)
+    - Protocol version negotiation (MCP-Protocol-Version header)
+    - Message batching for high-throughput streaming
+    - orjson serialization on the event hot path (stdlib json fallback)
+
+@see https://github.com/iowarp/agent-toolkit
+@see https://modelcontextprotocol.io/specification/2025-06-18/basic/transports
+"""
+
+#!/usr/bin/env python3
+# /// script
+# dependencies = [
+#   "aiohttp>=3.10.0",
+#   "fastmcp>=0.2.0",
+#   "orjson>=3.9.0",
+#   "pydantic>=2.4.2,<3.0.0",
+# ]
+# requires-python = ">=3.10"
+# ///
+
+import asyncio
+import contextlib
+import functools
+import itertools
+import json
+import logging
+import secrets
+import sys
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from aiohttp import web
+from pydantic import BaseModel, ValidationError
+from mcp.types import (
+    JSONRPCError,
+    JSONRPCNotification,
+    JSONRPCRequest,
+    JSONRPCResponse,
+)
+
+from ..config import TransportConfig, get_config
+
+logger = logging.getLogger(__name__)
+
+# orjson serializes small dict payloads 2-5x faster than stdlib json and
+# emits compact output (no separators needed); OPT_SERIALIZE_NUMPY lets
+# HDF5 slice results serialize without a Python-level conversion pass.
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        """Serialize to compact JSON bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    _loads = orjson.loads
+
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+    def _dumps(obj: Any) -> bytes:
+        """Serialize to compact JSON bytes (stdlib fallback)."""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+
+def install_optimized_event_loop() -> str:
+    """Install the fastest available event loop policy.
+
+    Call this before asyncio.run() - a policy set after the loop exists
+    has no effect on it. Preference order on Linux is an io_uring-backed
+    loop (socket submissions and completions go through SQ/CQ ring
+    entries, amortizing per-event syscall cost; deployments with CPU to
+    spare can enable SQPOLL so the kernel polls the submission queue and
+    the submit syscall disappears entirely), then uvloop's C-level
+    selector, then stock asyncio. All backends are optional dependencies;
+    missing ones are skipped silently.
+
+    Returns:
+        Name of the installed backend: "asyncio-uring", "uvloop", or
+        "asyncio" when neither accelerator is available.
+    """
+    if sys.platform == "linux":
+        try:
+            import asyncio_uring
+
+            asyncio.set_event_loop_policy(asyncio_uring.EventLoopPolicy())
+            logger.info("Event loop backend: asyncio-uring")
+            return "asyncio-uring"
+        except ImportError:
+            pass
+    try:
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("Event loop backend: uvloop")
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+
+@functools.lru_cache(maxsize=None, typed=True)
+def _model_serializer(model_type: type) -> Callable[[BaseModel], str]:
+    """Resolve a pydantic model type's JSON serializer once per type."""
+    return model_type.model_dump_json
+
+
+# MCP protocol versions this transport accepts
+MCP_PROTOCOL_VERSION = "2025-06-18"
+SUPPORTED_PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+
+# Seconds between keep-alive pings on idle streams
+PING_INTERVAL = 30.0
+
+# Seconds of inactivity before a client is considered stale
+CLIENT_TIMEOUT = 300.0
+
+# Origins accepted by _validate_origin; str.startswith checks the whole
+# tuple in one C call
+_ALLOWED_ORIGIN_PREFIXES = (
+    "http://localhost",
+    "http://127.0.0.1",
+    "https://localhost",
+    "https://127.0.0.1",
+)
+
+# Key under which the middleware stashes the negotiated protocol
+# version on each request
+_MCP_VERSION_KEY = "mcp_version"
+
+# Fixed JSON bytes of the two highest-volume control frames; only the
+# client id / timestamp varies, so these payloads never pass through
+# the serializer
+_CONNECTED_PREFIX = b'{"client_id":"'
+_CONNECTED_SUFFIX = b'"}'
+_PING_PREFIX = b'{"timestamp":'
+_PING_SUFFIX = b"}"
+
+# JSON-RPC message union handled by this transport
+JSONRPCMessage = Union[
+    JSONRPCRequest, JSONRPCNotification, JSONRPCResponse, JSONRPCError
+]
+
+# Handler invoked for each incoming JSON-RPC request
+MessageHandler = Callable[[JSONRPCMessage], Awaitable[Optional[JSONRPCMessage]]]
+
+
+@dataclass
+class SSEClient:
+    """State for one connected SSE stream.
+
+    Outgoing events sit in a bounded deque with an Event for consumer
+    wakeups rather than an asyncio.Queue: appends stay lock-free, memory
+    per client is capped, and a slow consumer drops events (counted in
+    `dropped`) instead of growing the buffer without bound.
+    """
+
+    client_id: str
+    response: web.StreamResponse
+    queue: Deque[Tuple[str, Any]] = field(default_factory=deque)
+    has_data: asyncio.Event = field(default_factory=asyncio.Event)
+    dropped: int = 0
+    event_counter: int = 0
+    last_activity: float = 0.0
+    session_id: Optional[str] = None
+    # Reusable frame assembly buffer, refilled per event so the pieces
+    # of a frame are concatenated without a fresh container each time.
+    # Only an immutable snapshot is ever handed to the transport: aiohttp
+    # can retain the passed object past write() (writelines on chunked
+    # responses, uvloop's Py_buffer hold), so the mutable buffer itself
+    # must never cross that boundary.
+    buffer: bytearray = field(default_factory=lambda: bytearray(8192))
+
+
+@dataclass
+class SessionInfo:
+    """State for one MCP session."""
+
+    session_id: str
+    created_at: float
+    last_accessed: float
+    protocol_version: str
+
+
+class SSETransport:
+    """SSE/HTTP transport implementing the MCP Streamable HTTP specification.
+
+    Exposes a single /mcp endpoint (POST for client->server JSON-RPC,
+    GET for the server->client SSE stream, DELETE for session teardown)
+    plus /health and /stats endpoints for monitoring.
+    """
+
+    # Static SSE response headers, shared across connections; only the
+    # per-session Mcp-Session-Id header varies
+    _SSE_HEADERS = MappingProxyType(
+        {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+    )
+
+    def __init__(
+        self,
+        config: Optional[TransportConfig] = None,
+        message_handler: Optional[MessageHandler] = None,
+        trust_payload: bool = False,
+    ):
+        self.config = config or get_config().transport
+        self.message_handler = message_handler
+        # Opt-in for trusted internal traffic: skip pydantic validation
+        # when constructing incoming messages (~10x faster ingestion)
+        self.trust_payload = trust_payload
+        self.clients: Dict[str, SSEClient] = {}
+        self.sessions: OrderedDict[str, SessionInfo] = OrderedDict()
+        self.event_history: Dict[str, Deque[Tuple[str, bytes]]] = {}
+        self.running = False
+        self.app: Optional[web.Application] = None
+        self.runner: Optional[web.AppRunner] = None
+        self.site: Optional[web.TCPSite] = None
+        self.stats = {
+            "messages_sent": 0,
+            "messages_received": 0,
+            "clients_connected": 0,
+            "errors": 0,
+        }
+        self._client_counter = 0
+        self._ping_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Cached /health body, rebuilt only when the state it reports flips
+        self._health_state: Optional[Tuple[bool, int]] = None
+        self._health_body = b""
+
+    # =====================================================================
+    # Lifecycle
+    # =====================================================================
+
+    def _build_app(self) -> web.Application:
+        """Build the aiohttp application with MCP routes."""
+        # client_max_size makes aiohttp reject oversized bodies before any
+        # JSON parsing happens
+        app = web.Application(
+            client_max_size=self.config.max_request_size,
+            middlewares=[self._validate_mcp_request],
+        )
+        app.router.add_post("/mcp", self._handle_post)
+        app.router.add_get("/mcp", self._initiate_sse)
+        app.router.add_delete("/mcp", self._handle_delete)
+        app.router.add_get("/health", self._handle_health)
+        app.router.add_get("/stats", self._handle_stats)
+        return app
+
+    @web.middleware
+    async def _validate_mcp_request(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Validate Origin and protocol version once per /mcp request.
+
+        Centralizing the checks here means each header is looked up and
+        parsed exactly once per request; handlers read the negotiated
+        version from request[_MCP_VERSION_KEY] instead of re-validating.
+        Monitoring endpoints are exempt - probes send neither header.
+        """
+        if request.path == "/mcp":
+            if not self._validate_origin(request):
+                self.stats["errors"] += 1
+                return web.Response(status=403, text="Forbidden: invalid origin")
+            version = self._validate_protocol_version(request)
+            if version is None:
+                self.stats["errors"] += 1
+                return web.Response(
+                    status=400, text="Unsupported protocol version"
+                )
+            request[_MCP_VERSION_KEY] = version
+        return await handler(request)
+
+    async def start(self) -> None:
+        """Start the HTTP server and background ping task."""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self.app = self._build_app()
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        self.site = web.TCPSite(
+            self.runner, self.config.sse_host, self.config.sse_port
+        )
+        await self.site.start()
+        self.running = True
+        self._ping_task = asyncio.create_task(self._ping_clients())
+        logger.info(
+            f"SSE transport listening on "
+            f"{self.config.sse_host}:{self.config.sse_port}"
+        )
+
+    async def stop(self) -> None:
+        """Stop the HTTP server and disconnect all clients."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._ping_task:
+            self._ping_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._ping_task
+            self._ping_task = None
+
+        for client_id in list(self.clients):
+            await self._close_client(client_id)
+
+        if self.runner:
+            await self.runner.cleanup()
+        logger.info("SSE transport stopped")
+
+    def _now(self) -> float:
+        """Monotonic timestamp from the cached event loop.
+
+        asyncio.get_event_loop() does a thread-local lookup on every call
+        (and is deprecated outside a running loop on 3.12+); the loop is
+        cached once in start() and lazily here for direct use in tests.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop.time()
+
+    # =====================================================================
+    # Validation
+    # =====================================================================
+
+    def _validate_origin(self, request: web.Request) -> bool:
+        """Validate the Origin header to prevent DNS-rebinding attacks."""
+        origin = request.headers.get("Origin")
+        if origin is None:
+            # Non-browser clients (curl, SDKs) send no Origin header
+            return True
+        return origin.startswith(_ALLOWED_ORIGIN_PREFIXES)
+
+    def _validate_protocol_version(self, request: web.Request) -> Optional[str]:
+        """Return the negotiated protocol version, or None if unsupported."""
+        version = request.headers.get("MCP-Protocol-Version", MCP_PROTOCOL_VERSION)
+        if version in SUPPORTED_PROTOCOL_VERSIONS:
+            return version
+        return None
+
+    # =====================================================================
+    # Session Management
+    # =====================================================================
+
+    def _create_session(self, protocol_version: str) -> str:
+        """Create a new session and return its ID.
+
+        token_hex goes straight from CSPRNG bytes to hex in C, about 2x
+        faster than uuid4's Python-level formatting for the same 128 bits
+        of entropy - noticeable when many clients reconnect at once.
+        """
+        # Evict the least-recently-used session at capacity; piggybacking
+        # eviction on creation keeps memory bounded without a periodic sweep
+        if len(self.sessions) >= self.config.max_sessions:
+            evicted_id, _ = self.sessions.popitem(last=False)
+            # The session's replay history must go with it, or eviction
+            # bounds the session dict but not the memory behind it
+            self.event_history.pop(evicted_id, None)
+            logger.debug(f"Evicted LRU session {evicted_id}")
+
+        session_id = secrets.token_hex(16)
+        now = self._now()
+        self.sessions[session_id] = SessionInfo(
+            session_id=session_id,
+            created_at=now,
+            last_accessed=now,
+            protocol_version=protocol_version,
+        )
+        logger.debug(f"Created session {session_id}")
+        return session_id
+
+    def _validate_session(self, session_id: str) -> bool:
+        """Check that a session exists and refresh its access time."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        session.last_accessed = self._now()
+        self.sessions.move_to_end(session_id)
+        return True
+
+    # =====================================================================
+    # Message Parsing
+    # =====================================================================
+
+    def _parse_message(self, data: Any) -> JSONRPCMessage:
+        """Parse a raw dict into a typed JSON-RPC message.
+
+        With trust_payload set, messages are built via model_construct,
+        which skips field coercion and validation entirely - roughly an
+        order of magnitude faster, safe only for trusted internal traffic.
+
+        Raises:
+            ValueError: If the payload is not a valid JSON-RPC message.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("JSON-RPC message must be an object")
+        if "method" in data:
+            model = JSONRPCRequest if "id" in data else JSONRPCNotification
+        elif "result" in data:
+            model = JSONRPCResponse
+        elif "error" in data:
+            model = JSONRPCError
+        else:
+            raise ValueError(
+                "Invalid JSON-RPC message: missing method/result/error"
+            )
+        if self.trust_payload:
+            return model.model_construct(**data)
+        try:
+            return model(**data)
+        except ValidationError as e:
+            raise ValueError(f"Invalid JSON-RPC message: {e}") from e
+
+    # =====================================================================
+    # HTTP Handlers
+    # =====================================================================
+
+    async def _handle_post(self, request: web.Request) -> web.Response:
+        """Handle client->server JSON-RPC messages on POST /mcp.
+
+        Origin and protocol version are already validated by the
+        middleware, which stashes the negotiated version on the request.
+        """
+        version = request[_MCP_VERSION_KEY]
+
+        try:
+            data = await request.json(loads=_loads)
+        except (json.JSONDecodeError, ValueError):
+            self.stats["errors"] += 1
+            return web.Response(status=400, text="Invalid JSON")
+
+        if isinstance(data, list):
+            if not data:
+                return web.Response(status=400, text="Empty batch")
+            # Reject hostile batch sizes before paying for per-message
+            # pydantic validation
+            if len(data) > self.config.max_batch_size:
+                self.stats["errors"] += 1
+                return web.Response(status=413, text="Batch too large")
+            items = data
+        else:
+            items = (data,)
+
+        # Parse and classify in one pass; counting by type here avoids
+        # re-walking the batch with any()/all() chains below
+        messages: List[JSONRPCMessage] = []
+        n_requests = n_notifications = n_responses = 0
+        is_initialize = False
+        try:
+            for item in items:
+                message = self._parse_message(item)
+                messages.append(message)
+                if isinstance(message, JSONRPCRequest):
+                    n_requests += 1
+                    if message.method == "initialize":
+                        is_initialize = True
+                elif isinstance(message, JSONRPCNotification):
+                    n_notifications += 1
+                else:
+                    n_responses += 1
+        except ValueError as e:
+            self.stats["errors"] += 1
+            return web.Response(status=400, text=str(e))
+
+        self.stats["messages_received"] += len(messages)
+        logger.debug(
+            f"POST /mcp: {n_requests} requests, "
+            f"{n_notifications} notifications, {n_responses} responses"
+        )
+
+        # Session handling: initialize creates a session, everything else
+        # must present a valid one (if the client uses sessions at all)
+        session_id = request.headers.get("Mcp-Session-Id")
+        if is_initialize:
+            session_id = self._create_session(version)
+        elif session_id is not None and not self._validate_session(session_id):
+            return web.Response(status=404, text="Unknown session")
+
+        headers = {}
+        if session_id:
+            headers["Mcp-Session-Id"] = session_id
+
+        # Per spec: notifications and responses get 202 Accepted with no body
+        if n_requests == 0:
+            return web.Response(status=202, headers=headers)
+
+        # Dispatch requests to the message handler and collect responses
+        responses: List[Dict[str, Any]] = []
+        if self.message_handler is not None:
+            for message in messages:
+                if isinstance(message, JSONRPCRequest):
+                    result = await self.message_handler(message)
+                    if result is not None:
+                        if isinstance(result, BaseModel):
+                            responses.append(result.model_dump())
+                        else:
+                            responses.append(result)
+
+        payload: Any = responses if isinstance(data, list) else (
+            responses[0] if responses else None
+        )
+        if payload is None:
+            return web.Response(status=202, headers=headers)
+        return web.Response(
+            body=_dumps(payload),
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def _handle_delete(self, request: web.Request) -> web.Response:
+        """Terminate a session on DELETE /mcp."""
+        session_id = request.headers.get("Mcp-Session-Id")
+        if session_id is None or self.sessions.pop(session_id, None) is None:
+            return web.Response(status=404, text="Unknown session")
+        # A terminated session can never resume, so drop its replay history
+        self.event_history.pop(session_id, None)
+        logger.debug(f"Terminated session {session_id}")
+        return web.Response(status=204)
+
+    def _json_response(self, payload: Any) -> web.Response:
+        """Build a JSON response through the shared orjson serializer.
+
+        web.json_response constructs a fresh stdlib JSONEncoder per call;
+        this is on the load-balancer probe path, so it matters.
+        """
+        return web.Response(
+            body=_dumps(payload), content_type="application/json"
+        )
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        """Health check endpoint for load balancers."""
+        # Probes arrive every few seconds; reuse the serialized body until
+        # the reported state actually changes
+        state = (self.running, len(self.clients))
+        if state != self._health_state:
+            self._health_body = _dumps(
+                {
+                    "status": "healthy",
+                    "transport": "sse",
+                    "running": self.running,
+                    "clients": len(self.clients),
+                }
+            )
+            self._health_state = state
+        return web.Response(
+            body=self._health_body, content_type="application/json"
+        )
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        """Transport statistics endpoint."""
+        return self._json_response(
+            {
+                **self.stats,
+                "active_clients": len(self.clients),
+                "active_sessions": len(self.sessions),
+            }
+        )
+
+    # =====================================================================
+    # SSE Streaming
+    # =====================================================================
+
+    async def _initiate_sse(self, request: web.Request) -> web.StreamResponse:
+        """Set up an SSE stream on GET /mcp and pump queued events out."""
+        if len(self.clients) >= self.config.max_connections:
+            return web.Response(status=503, text="Too many connections")
+
+        session_id = request.headers.get("Mcp-Session-Id")
+        if session_id is not None and not self._validate_session(session_id):
+            return web.Response(status=404, text="Unknown session")
+
+        if session_id:
+            headers = {**self._SSE_HEADERS, "Mcp-Session-Id": session_id}
+        else:
+            headers = self._SSE_HEADERS
+        response = web.StreamResponse(status=200, headers=headers)
+        await response.prepare(request)
+
+        self._client_counter += 1
+        client_id = f"client_{self._client_counter}"
+        client = SSEClient(
+            client_id=client_id,
+            response=response,
+            last_activity=self._now(),
+            session_id=session_id,
+        )
+        # Continue the session's event numbering across reconnects so
+        # resumed streams keep a contiguous counter
+        prior_history = self.event_history.get(self._history_key(client))
+        if prior_history:
+            client.event_counter = int(prior_history[-1][0])
+
+        self.clients[client_id] = client
+        self.stats["clients_connected"] += 1
+        logger.info(f"SSE client connected: {client_id}")
+
+        try:
+            # Resume a broken stream first so replayed frames (original,
+            # lower IDs) precede newly numbered events on the wire
+            last_event_id = request.headers.get("Last-Event-ID")
+            if last_event_id:
+                await self._replay_events(client, last_event_id)
+
+            await self._send_control_event(
+                client,
+                "connected",
+                _CONNECTED_PREFIX + client_id.encode("ascii") + _CONNECTED_SUFFIX,
+            )
+
+            # Event-driven drain loop: wait once per burst, then pop the
+            # ring dry. Keep-alive pings arrive through the same ring from
+            # the transport-wide _ping_clients timer.
+            closing = False
+            while self.running and not closing:
+                await client.has_data.wait()
+                client.has_data.clear()
+                while client.queue:
+                    kind, payload = client.queue.popleft()
+                    if kind == "close":
+                        closing = True
+                        break
+                    if kind == "ping":
+                        # repr() of a float round-trips exactly, so the
+                        # payload is valid JSON without a dumps call
+                        await self._send_control_event(
+                            client,
+                            "ping",
+                            _PING_PREFIX + repr(payload).encode("ascii") + _PING_SUFFIX,
+                        )
+                    elif kind == "batch_iter":
+                        await self._stream_batch(client, payload)
+                    else:
+                        await self._send_sse_event(client, "message", payload)
+                if client.dropped and not closing:
+                    # Tell the client events were shed while it lagged
+                    await self._send_control_event(
+                        client, "overflow", _dumps({"dropped": client.dropped})
+                    )
+                    client.dropped = 0
+        except (ConnectionResetError, asyncio.CancelledError):
+            logger.debug(f"SSE client disconnected: {client_id}")
+        finally:
+            self.clients.pop(client_id, None)
+            if session_id is None:
+                # Sessionless reconnects get a fresh client_id, so history
+                # keyed by this one is unreachable - drop it or every
+                # one-shot client leaks a deque
+                self.event_history.pop(client_id, None)
+            logger.info(f"SSE client closed: {client_id}")
+
+        return response
+
+    async def _send_sse_event(
+        self,
+        client: SSEClient,
+        event_type: str,
+        data: Union[bytes, Dict[str, Any]],
+    ) -> None:
+        """Write one SSE event frame to a client stream.
+
+        Used for JSON-RPC message frames only: these get an event ID and
+        are recorded for Last-Event-ID resumption, which is also why
+        _replay_events can re-emit everything it finds as event: message.
+        Transport control frames go through _send_control_event instead.
+
+        Accepts pre-serialized bytes (the common case: producers serialize
+        once with orjson before enqueueing) or a dict.
+        The frame is assembled in the client's reusable buffer, then a
+        bytes snapshot is handed to aiohttp. The snapshot copy is
+        deliberate: on backpressure aiohttp can retain the written object
+        past write() (transport.writelines passes large chunks through
+        uncopied, and uvloop holds a Py_buffer until the send completes),
+        so writing the mutable buffer itself would make the next frame's
+        refill corrupt in-flight data or raise BufferError.
+        """
+        event_id = self._generate_event_id(client)
+        data_bytes = data if isinstance(data, bytes) else _dumps(data)
+        buf = client.buffer
+        buf.clear()
+        buf += b"id: "
+        buf += event_id.encode("utf-8")
+        buf += b"\nevent: "
+        buf += event_type.encode("utf-8")
+        buf += b"\ndata: "
+        buf += data_bytes
+        buf += b"\n\n"
+        await client.response.write(bytes(buf))
+        self._store_event(self._history_key(client), event_id, data_bytes)
+        self.stats["messages_sent"] += 1
+        client.last_activity = self._now()
+
+    async def _send_control_event(
+        self, client: SSEClient, event_type: str, data_bytes: bytes
+    ) -> None:
+        """Write a transport control frame (connected, ping, overflow).
+
+        Control frames describe the stream itself, not JSON-RPC traffic,
+        so they are not valid replay material: they carry no id line
+        (leaving the client's Last-Event-ID untouched) and are not
+        recorded in history, which also keeps keep-alive pings from
+        evicting real messages out of the replay window.
+        """
+        buf = client.buffer
+        buf.clear()
+        buf += b"event: "
+        buf += event_type.encode("utf-8")
+        buf += b"\ndata: "
+        buf += data_bytes
+        buf += b"\n\n"
+        await client.response.write(bytes(buf))
+        client.last_activity = self._now()
+
+    async def _stream_batch(
+        self, client: SSEClient, parts: List[bytes]
+    ) -> None:
+        """Stream a batch as one SSE event without materializing the array.
+
+        Writes the JSON array incrementally, so time-to-first-byte and
+        peak memory stay constant in the batch size; each write() awaits
+        aiohttp's flow-control drain, so a slow consumer backpressures
+        the stream naturally. Streamed batch frames are fire-and-forget
+        and are not recorded for replay, so they carry no id line:
+        per the SSE spec an id-less event leaves the client's
+        Last-Event-ID untouched, which keeps the stored event IDs
+        contiguous and the arithmetic resume position in _replay_events
+        exact.
+        """
+        await client.response.write(b"event: batch\ndata: [")
+        last = len(parts) - 1
+        for index, part in enumerate(parts):
+            await client.response.write(part)
+            if index != last:
+                await client.response.write(b",")
+        await client.response.write(b"]\n\n")
+        self.stats["messages_sent"] += 1
+        client.last_activity = self._now()
+
+    def _generate_event_id(self, client: SSEClient) -> str:
+        """Generate a monotonically increasing event ID for a client.
+
+        IDs are plain integers: an increment plus str(int) is far cheaper
+        than f-string composition, and Last-Event-ID parsing on resume
+        becomes a single int() call.
+        """
+        client.event_counter += 1
+        return str(client.event_counter)
+
+    @staticmethod
+    def _history_key(client: SSEClient) -> str:
+        """Key event history by session so streams survive reconnects."""
+        return client.session_id or client.client_id
+
+    def _store_event(self, history_key: str, event_id: str, data: bytes) -> None:
+        """Record an event for stream resumption.
+
+        History is a bounded deque, so appending past capacity evicts the
+        oldest event in O(1) instead of reallocating the container.
+        """
+        history = self.event_history.get(history_key)
+        if history is None:
+            history = self.event_history[history_key] = deque(
+                maxlen=self.config.event_history_size
+            )
+        history.append((event_id, data))
+
+    async def _replay_events(self, client: SSEClient, last_event_id: str) -> None:
+        """Replay events that followed `last_event_id` on a resumed stream.
+
+        Event IDs are integer counters and history holds a contiguous run
+        of events, so the resume position is pure arithmetic against the
+        counter of the oldest surviving event - no per-entry string
+        comparisons.
+        """
+        history = self.event_history.get(self._history_key(client))
+        if not history:
+            return
+        try:
+            last_idx = int(last_event_id)
+        except ValueError:
+            return
+        base_counter = int(history[0][0])
+        start = last_idx - base_counter + 1
+        if start >= len(history):
+            return
+        if start < 0:
+            # The requested event was already evicted; replay what survives
+            start = 0
+        for event_id, data in itertools.islice(history, start, None):
+            # Re-emit with the original ID; replayed frames are not stored
+            # again, so the session history stays free of duplicates
+            frame = b"".join(
+                (
+                    b"id: ",
+                    event_id.encode("utf-8"),
+                    b"\nevent: message\ndata: ",
+                    data,
+                    b"\n\n",
+                )
+            )
+            await client.response.write(memoryview(frame))
+
+    # =====================================================================
+    # Server -> Client Messaging
+    # =====================================================================
+
+    def _enqueue(self, client: SSEClient, item: Tuple[str, Any]) -> bool:
+        """Append an event to a client's ring, dropping when it is full.
+
+        deque.append is a single C call with no lock handoff, and the
+        Event wakes the stream loop only when it is actually parked.
+        Dropped events are counted so the stream loop can notify the
+        client it fell behind.
+        """
+        if len(client.queue) >= self.config.client_queue_size:
+            client.dropped += 1
+            return False
+        client.queue.append(item)
+        client.has_data.set()
+        return True
+
+    async def send_message(
+        self, client_id: str, message: Union[BaseModel, Dict[str, Any]]
+    ) -> bool:
+        """Queue one message for delivery on a client's SSE stream."""
+        client = self.clients.get(client_id)
+        if client is None:
+            logger.warning(f"send_message: unknown client {client_id}")
+            return False
+        payload = message.model_dump() if isinstance(message, BaseModel) else message
+        return self._enqueue(client, ("message", _dumps(payload)))
+
+    async def send_batch(
+        self, client_id: str, messages: List[Union[BaseModel, Dict[str, Any]]]
+    ) -> bool:
+        """Queue a batch of messages as a single SSE event."""
+        client = self.clients.get(client_id)
+        if client is None:
+            logger.warning(f"send_batch: unknown client {client_id}")
+            return False
+        # Serialize each message straight to JSON, skipping the intermediate
+        # model_dump() dict; the fragments are streamed into the JSON array
+        # by _stream_batch without ever materializing the full payload
+        parts = [
+            _model_serializer(type(m))(m).encode("utf-8")
+            if isinstance(m, BaseModel)
+            else _dumps(m)
+            for m in messages
+        ]
+        return self._enqueue(client, ("batch_iter", parts))
+
+    # =====================================================================
+    # Background Maintenance
+    # =====================================================================
+
+    async def _ping_clients(self) -> None:
+        """Ping idle clients and close stale ones."""
+        while self.running:
+            await asyncio.sleep(PING_INTERVAL)
+            current_time = self._now()
+            stale = []
+            for client in list(self.clients.values()):
+                if current_time - client.last_activity > CLIENT_TIMEOUT:
+                    stale.append(client.client_id)
+                else:
+                    # A dropped ping is fine - a client too backlogged to
+                    # take one has fresher traffic keeping it alive anyway
+                    self._enqueue(client, ("ping", current_time))
+            if stale:
+                # Close stale clients concurrently; one failing close must
+                # not strand the rest
+                await asyncio.gather(
+                    *(self._close_client(client_id) for client_id in stale),
+                    return_exceptions=True,
+                )
+
+    async def _close_client(self, client_id: str) -> None:
+        """Ask a client's stream loop to shut down."""
+        client = self.clients.get(client_id)
+        if client is None:
+            return
+        # Session-keyed event history is retained so the stream can
+        # resume; sessionless history is dropped by the stream loop on
+        # exit. The close sentinel bypasses the ring bound: shutdown
+        # must land even when the client is saturated.
+        client.queue.append(("close", None))
+        client.has_data.set()
@@ -0,0 +1,1049 @@
+"""
+Comprehensive tests for the SSE transport module.
+
+Tests serialization, origin/protocol validation, session management,
+JSON-RPC message parsing, event history, stream resumption, and the
+HTTP endpoints (POST/GET/DELETE /mcp, /health, /stats).
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from mcp.types import (
+    JSONRPCError,
+    JSONRPCNotification,
+    JSONRPCRequest,
+    JSONRPCResponse,
+)
+
+# Import the transport module directly - DO NOT import server
+from hdf5_mcp.config import TransportConfig
+from hdf5_mcp.transports import sse_transport
+from hdf5_mcp.transports.sse_transport import (
+    SSEClient,
+    SSETransport,
+    _dumps,
+    _loads,
+)
+
+
+@pytest.fixture
+def transport():
+    """Transport instance with default config, not bound to a socket."""
+    return SSETransport(config=TransportConfig())
+
+
+@pytest.fixture
+def echo_transport():
+    """Transport whose handler echoes a result for every request."""
+
+    async def handler(message):
+        return JSONRPCResponse(
+            jsonrpc="2.0", id=message.id, result={"echo": message.method}
+        )
+
+    return SSETransport(config=TransportConfig(), message_handler=handler)
+
+
+@pytest_asyncio.fixture
+async def http_client(echo_transport):
+    """aiohttp test client bound to the transport's application."""
+    echo_transport.running = True
+    client = TestClient(TestServer(echo_transport._build_app()))
+    await client.start_server()
+    yield client
+    echo_transport.running = False
+    await client.close()
+
+
+class FakeResponse:
+    """Minimal stand-in for web.StreamResponse recording written frames."""
+
+    def __init__(self):
+        self.writes = []
+
+    async def write(self, data):
+        self.writes.append(bytes(data))
+
+
+class RetainingResponse:
+    """Stand-in for a backpressured transport.
+
+    Retains each written object uncopied, the way transport.writelines
+    and uvloop hold large chunks until the send completes - so passing a
+    view of a reused buffer corrupts earlier writes or raises
+    BufferError on the next refill.
+    """
+
+    def __init__(self):
+        self.writes = []
+
+    async def write(self, data):
+        self.writes.append(data)
+
+
+def make_request(request):
+    """Build a mock aiohttp request carrying only headers."""
+
+    class FakeRequest:
+        def __init__(self, headers):
+            self.headers = headers
+
+    return FakeRequest(request)
+
+
+# =========================================================================
+# Serialization
+# =========================================================================
+
+
+class TestDumps:
+    """Tests for the JSON serialization helper."""
+
+    def test_returns_bytes(self):
+        assert isinstance(_dumps({"a": 1}), bytes)
+
+    def test_compact_output(self):
+        assert _dumps({"a": 1, "b": [2, 3]}) == b'{"a":1,"b":[2,3]}'
+
+    def test_round_trip(self):
+        payload = {"nested": {"list": [1, 2.5, "three"], "flag": True}}
+        assert json.loads(_dumps(payload)) == payload
+
+    @pytest.mark.skipif(
+        sse_transport.orjson is None, reason="orjson not installed"
+    )
+    def test_serializes_numpy_arrays(self):
+        data = {"values": np.arange(4)}
+        assert json.loads(_dumps(data)) == {"values": [0, 1, 2, 3]}
+
+    def test_loads_round_trip(self):
+        payload = {"nested": {"list": [1, 2.5, "three"], "flag": True}}
+        assert _loads(_dumps(payload)) == payload
+
+    def test_loads_rejects_invalid(self):
+        with pytest.raises(ValueError):
+            _loads(b"not json")
+
+    def test_connected_frame_matches_serializer(self):
+        composed = (
+            sse_transport._CONNECTED_PREFIX
+            + b"client_7"
+            + sse_transport._CONNECTED_SUFFIX
+        )
+        assert composed == _dumps({"client_id": "client_7"})
+
+    def test_ping_frame_matches_serializer(self):
+        composed = (
+            sse_transport._PING_PREFIX
+            + repr(123.5).encode("ascii")
+            + sse_transport._PING_SUFFIX
+        )
+        assert json.loads(composed) == {"timestamp": 123.5}
+
+
+class TestInstallOptimizedEventLoop:
+    """Tests for the optional event-loop policy helper."""
+
+    def test_returns_backend_name(self):
+        backend = sse_transport.install_optimized_event_loop()
+        assert backend in ("asyncio-uring", "uvloop", "asyncio")
+
+    def test_missing_accelerators_leave_default_policy(self, monkeypatch):
+        import builtins
+
+        real_import = builtins.__import__
+
+        def no_accelerators(name, *args, **kwargs):
+            if name in ("asyncio_uring", "uvloop"):
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "__import__", no_accelerators)
+        assert sse_transport.install_optimized_event_loop() == "asyncio"
+
+
+# =========================================================================
+# Origin Validation
+# =========================================================================
+
+
+class TestValidateOrigin:
+    """Tests for anti-DNS-rebinding origin validation."""
+
+    def test_missing_origin_allowed(self, transport):
+        assert transport._validate_origin(make_request({})) is True
+
+    @pytest.mark.parametrize(
+        "origin",
+        [
+            "http://localhost",
+            "http://localhost:8765",
+            "http://127.0.0.1:8765",
+            "https://localhost:8765",
+            "https://127.0.0.1",
+        ],
+    )
+    def test_local_origins_allowed(self, transport, origin):
+        request = make_request({"Origin": origin})
+        assert transport._validate_origin(request) is True
+
+    @pytest.mark.parametrize(
+        "origin",
+        ["http://evil.com", "https://attacker.localhost.evil.com:80"],
+    )
+    def test_remote_origins_rejected(self, transport, origin):
+        request = make_request({"Origin": origin})
+        assert transport._validate_origin(request) is False
+
+
+# =========================================================================
+# Protocol Version Validation
+# =========================================================================
+
+
+class TestValidateProtocolVersion:
+    """Tests for MCP-Protocol-Version negotiation."""
+
+    def test_missing_header_defaults_to_current(self, transport):
+        version = transport._validate_protocol_version(make_request({}))
+        assert version == sse_transport.MCP_PROTOCOL_VERSION
+
+    @pytest.mark.parametrize(
+        "version", list(sse_transport.SUPPORTED_PROTOCOL_VERSIONS)
+    )
+    def test_supported_versions_accepted(self, transport, version):
+        request = make_request({"MCP-Protocol-Version": version})
+        assert transport._validate_protocol_version(request) == version
+
+    def test_unsupported_version_rejected(self, transport):
+        request = make_request({"MCP-Protocol-Version": "1999-01-01"})
+        assert transport._validate_protocol_version(request) is None
+
+
+# =========================================================================
+# Session Management
+# =========================================================================
+
+
+class TestSessions:
+    """Tests for session creation and validation."""
+
+    @pytest.mark.asyncio
+    async def test_create_session_returns_id(self, transport):
+        session_id = transport._create_session("2025-06-18")
+        assert isinstance(session_id, str)
+        assert session_id in transport.sessions
+
+    @pytest.mark.asyncio
+    async def test_create_session_records_protocol_version(self, transport):
+        session_id = transport._create_session("2024-11-05")
+        assert transport.sessions[session_id].protocol_version == "2024-11-05"
+
+    @pytest.mark.asyncio
+    async def test_session_ids_unique(self, transport):
+        ids = {transport._create_session("2025-06-18") for _ in range(50)}
+        assert len(ids) == 50
+
+    @pytest.mark.asyncio
+    async def test_validate_known_session(self, transport):
+        session_id = transport._create_session("2025-06-18")
+        assert transport._validate_session(session_id) is True
+
+    @pytest.mark.asyncio
+    async def test_validate_unknown_session(self, transport):
+        assert transport._validate_session("no-such-session") is False
+
+    @pytest.mark.asyncio
+    async def test_capacity_evicts_least_recently_used(self, transport):
+        transport.config.max_sessions = 3
+        ids = [transport._create_session("2025-06-18") for _ in range(3)]
+        # Touch the oldest so the middle one becomes LRU
+        transport._validate_session(ids[0])
+        transport._create_session("2025-06-18")
+        assert ids[1] not in transport.sessions
+        assert ids[0] in transport.sessions
+        assert len(transport.sessions) == 3
+
+    @pytest.mark.asyncio
+    async def test_eviction_drops_event_history(self, transport):
+        transport.config.max_sessions = 1
+        first = transport._create_session("2025-06-18")
+        transport._store_event(first, "1", b"{}")
+        transport._create_session("2025-06-18")
+        assert first not in transport.event_history
+
+    @pytest.mark.asyncio
+    async def test_validate_refreshes_access_time(self, transport):
+        session_id = transport._create_session("2025-06-18")
+        session = transport.sessions[session_id]
+        session.last_accessed = 0.0
+        transport._validate_session(session_id)
+        assert session.last_accessed > 0.0
+
+
+# =========================================================================
+# Message Parsing
+# =========================================================================
+
+
+class TestParseMessage:
+    """Tests for JSON-RPC message parsing."""
+
+    def test_parse_request(self, transport):
+        message = transport._parse_message(
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        )
+        assert isinstance(message, JSONRPCRequest)
+        assert message.method == "tools/list"
+
+    def test_parse_request_with_params(self, transport):
+        message = transport._parse_message(
+            {
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/call",
+                "params": {"name": "open_file"},
+            }
+        )
+        assert isinstance(message, JSONRPCRequest)
+        assert message.params == {"name": "open_file"}
+
+    def test_parse_notification(self, transport):
+        message = transport._parse_message(
+            {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        )
+        assert isinstance(message, JSONRPCNotification)
+
+    def test_parse_response(self, transport):
+        message = transport._parse_message(
+            {"jsonrpc": "2.0", "id": 3, "result": {"ok": True}}
+        )
+        assert isinstance(message, JSONRPCResponse)
+
+    def test_parse_error_response(self, transport):
+        message = transport._parse_message(
+            {
+                "jsonrpc": "2.0",
+                "id": 4,
+                "error": {"code": -32600, "message": "Invalid Request"},
+            }
+        )
+        assert isinstance(message, JSONRPCError)
+
+    def test_parse_non_dict_rejected(self, transport):
+        with pytest.raises(ValueError):
+            transport._parse_message([1, 2, 3])
+
+    def test_parse_missing_fields_rejected(self, transport):
+        with pytest.raises(ValueError):
+            transport._parse_message({"jsonrpc": "2.0"})
+
+    def test_parse_invalid_request_rejected(self, transport):
+        with pytest.raises(ValueError):
+            transport._parse_message({"jsonrpc": "2.0", "id": 5, "method": 123})
+
+
+class TestTrustedParseMessage:
+    """Tests for the trust_payload fast path."""
+
+    @pytest.fixture
+    def trusted(self):
+        return SSETransport(config=TransportConfig(), trust_payload=True)
+
+    def test_parses_request_without_validation(self, trusted):
+        message = trusted._parse_message(
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        )
+        assert isinstance(message, JSONRPCRequest)
+        assert message.method == "tools/list"
+
+    def test_parses_notification(self, trusted):
+        message = trusted._parse_message({"jsonrpc": "2.0", "method": "ping"})
+        assert isinstance(message, JSONRPCNotification)
+
+    def test_skips_field_validation(self, trusted):
+        # model_construct accepts whatever a trusted producer sends
+        message = trusted._parse_message(
+            {"jsonrpc": "2.0", "id": 5, "method": 123}
+        )
+        assert message.method == 123
+
+    def test_still_rejects_non_messages(self, trusted):
+        with pytest.raises(ValueError):
+            trusted._parse_message({"jsonrpc": "2.0"})
+
+    def test_untrusted_by_default(self, transport):
+        assert transport.trust_payload is False
+
+
+# =========================================================================
+# Event History
+# =========================================================================
+
+
+class TestEventHistory:
+    """Tests for event ID generation and resumption history."""
+
+    def test_event_ids_monotonic(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        first = transport._generate_event_id(client)
+        second = transport._generate_event_id(client)
+        assert first == "1"
+        assert second == "2"
+
+    def test_history_key_prefers_session(self, transport):
+        client = SSEClient(
+            client_id="client_1", response=None, session_id="sess"
+        )
+        assert transport._history_key(client) == "sess"
+
+    def test_history_key_falls_back_to_client_id(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        assert transport._history_key(client) == "client_1"
+
+    def test_store_event_appends(self, transport):
+        transport._store_event("client_1", "client_1_1", b"{}")
+        assert list(transport.event_history["client_1"]) == [
+            ("client_1_1", b"{}")
+        ]
+
+    def test_store_event_caps_history(self, transport):
+        for n in range(150):
+            transport._store_event("client_1", f"client_1_{n}", b"{}")
+        history = transport.event_history["client_1"]
+        assert len(history) == 100
+        assert history[0][0] == "client_1_50"
+        assert history[-1][0] == "client_1_149"
+
+    def test_history_capacity_follows_config(self, transport):
+        transport.config.event_history_size = 5
+        for n in range(20):
+            transport._store_event("client_1", f"client_1_{n}", b"{}")
+        assert len(transport.event_history["client_1"]) == 5
+
+    @pytest.mark.asyncio
+    async def test_batch_frames_do_not_consume_ids(self, transport):
+        # An unstored frame with an id would leave a gap that breaks the
+        # arithmetic resume position and counter continuity on reconnect
+        client = SSEClient(client_id="client_1", response=FakeResponse())
+        await transport._send_sse_event(client, "message", {"seq": 1})
+        await transport._stream_batch(client, [b'{"n":1}', b'{"n":2}'])
+        await transport._send_sse_event(client, "message", {"seq": 2})
+        assert [eid for eid, _ in transport.event_history["client_1"]] == [
+            "1",
+            "2",
+        ]
+        assert client.event_counter == 2
+
+    def test_history_isolated_per_client(self, transport):
+        transport._store_event("client_1", "client_1_1", b"a")
+        transport._store_event("client_2", "client_2_1", b"b")
+        assert len(transport.event_history["client_1"]) == 1
+        assert len(transport.event_history["client_2"]) == 1
+
+
+class TestSendSSEEvent:
+    """Unit tests for frame assembly in the reusable client buffer."""
+
+    @pytest.mark.asyncio
+    async def test_consecutive_frames_reuse_buffer(self, transport):
+        client = SSEClient(client_id="client_1", response=FakeResponse())
+        buffer_before = client.buffer
+        await transport._send_sse_event(client, "message", {"seq": 1})
+        await transport._send_sse_event(client, "message", {"seq": 2})
+        assert client.response.writes == [
+            b'id: 1\nevent: message\ndata: {"seq":1}\n\n',
+            b'id: 2\nevent: message\ndata: {"seq":2}\n\n',
+        ]
+        assert client.buffer is buffer_before
+
+    @pytest.mark.asyncio
+    async def test_retained_writes_survive_buffer_reuse(self, transport):
+        # Frames handed to the transport must be immutable snapshots: a
+        # retained view of the reused buffer would alias the next frame
+        client = SSEClient(client_id="client_1", response=RetainingResponse())
+        payload = {"blob": "x" * 4096}
+        await transport._send_sse_event(client, "message", payload)
+        first = client.response.writes[0]
+        expected = b'id: 1\nevent: message\ndata: ' + _dumps(payload) + b"\n\n"
+        assert bytes(first) == expected
+        await transport._send_sse_event(client, "message", {"seq": 2})
+        assert bytes(first) == expected
+
+    @pytest.mark.asyncio
+    async def test_control_event_has_no_id_and_no_history(self, transport):
+        client = SSEClient(client_id="client_1", response=FakeResponse())
+        await transport._send_control_event(
+            client, "ping", b'{"timestamp":1.0}'
+        )
+        assert client.response.writes == [
+            b'event: ping\ndata: {"timestamp":1.0}\n\n'
+        ]
+        assert client.event_counter == 0
+        assert "client_1" not in transport.event_history
+
+    @pytest.mark.asyncio
+    async def test_frame_larger_than_initial_buffer(self, transport):
+        client = SSEClient(client_id="client_1", response=FakeResponse())
+        payload = {"blob": "x" * 20000}
+        await transport._send_sse_event(client, "message", payload)
+        (frame,) = client.response.writes
+        assert json.loads(frame.split(b"data: ")[1]) == payload
+
+
+class TestReplayEvents:
+    """Unit tests for indexed stream resumption."""
+
+    @pytest.fixture
+    def populated_history(self, transport):
+        """Fill the session's history with events 1..10."""
+        for n in range(1, 11):
+            transport._store_event("sess", str(n), b'{"seq":%d}' % n)
+        return transport
+
+    @staticmethod
+    def resumed_client():
+        return SSEClient(
+            client_id="client_2", response=FakeResponse(), session_id="sess"
+        )
+
+    @pytest.mark.asyncio
+    async def test_replays_events_after_id(self, populated_history):
+        client = self.resumed_client()
+        await populated_history._replay_events(client, "7")
+        payloads = [w.split(b"data: ")[1] for w in client.response.writes]
+        assert payloads == [b'{"seq":8}\n\n', b'{"seq":9}\n\n', b'{"seq":10}\n\n']
+
+    @pytest.mark.asyncio
+    async def test_replay_preserves_original_ids(self, populated_history):
+        client = self.resumed_client()
+        await populated_history._replay_events(client, "8")
+        ids = [w.split(b"\n")[0] for w in client.response.writes]
+        assert ids == [b"id: 9", b"id: 10"]
+
+    @pytest.mark.asyncio
+    async def test_replay_does_not_restore_history(self, populated_history):
+        client = self.resumed_client()
+        await populated_history._replay_events(client, "7")
+        assert len(populated_history.event_history["sess"]) == 10
+
+    @pytest.mark.asyncio
+    async def test_up_to_date_replays_nothing(self, populated_history):
+        client = self.resumed_client()
+        await populated_history._replay_events(client, "10")
+        assert client.response.writes == []
+
+    @pytest.mark.asyncio
+    async def test_evicted_id_replays_surviving_events(self, transport):
+        transport.config.event_history_size = 5
+        for n in range(1, 11):
+            transport._store_event("sess", str(n), b"{}")
+        client = self.resumed_client()
+        # Events 1-5 were evicted; best effort replays the surviving 6-10
+        await transport._replay_events(client, "2")
+        assert len(client.response.writes) == 5
+
+    @pytest.mark.asyncio
+    async def test_unknown_session_replays_nothing(self, transport):
+        client = self.resumed_client()
+        await transport._replay_events(client, "3")
+        assert client.response.writes == []
+
+    @pytest.mark.asyncio
+    async def test_malformed_id_replays_nothing(self, populated_history):
+        client = self.resumed_client()
+        await populated_history._replay_events(client, "bogus")
+        assert client.response.writes == []
+
+
+# =========================================================================
+# Server -> Client Messaging
+# =========================================================================
+
+
+class TestSendMessage:
+    """Tests for the producer-side message queue."""
+
+    @pytest.mark.asyncio
+    async def test_send_message_enqueues_bytes(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        assert await transport.send_message("client_1", {"id": 1}) is True
+        assert client.has_data.is_set()
+        kind, payload = client.queue.popleft()
+        assert kind == "message"
+        assert isinstance(payload, bytes)
+        assert json.loads(payload) == {"id": 1}
+
+    @pytest.mark.asyncio
+    async def test_send_message_serializes_models(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        message = JSONRPCNotification(jsonrpc="2.0", method="ping")
+        await transport.send_message("client_1", message)
+        _, payload = client.queue.popleft()
+        assert json.loads(payload)["method"] == "ping"
+
+    @pytest.mark.asyncio
+    async def test_send_message_unknown_client(self, transport):
+        assert await transport.send_message("nobody", {"id": 1}) is False
+
+    @pytest.mark.asyncio
+    async def test_send_batch_enqueues_fragments(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        messages = [{"id": n} for n in range(5)]
+        assert await transport.send_batch("client_1", messages) is True
+        kind, parts = client.queue.popleft()
+        assert kind == "batch_iter"
+        assert all(isinstance(part, bytes) for part in parts)
+        assert json.loads(b"[" + b",".join(parts) + b"]") == messages
+
+    @pytest.mark.asyncio
+    async def test_send_batch_serializes_models(self, transport):
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        messages = [
+            JSONRPCNotification(jsonrpc="2.0", method="ping"),
+            {"jsonrpc": "2.0", "method": "pong"},
+        ]
+        await transport.send_batch("client_1", messages)
+        _, parts = client.queue.popleft()
+        decoded = json.loads(b"[" + b",".join(parts) + b"]")
+        assert [m["method"] for m in decoded] == ["ping", "pong"]
+
+    @pytest.mark.asyncio
+    async def test_send_batch_unknown_client(self, transport):
+        assert await transport.send_batch("nobody", [{"id": 1}]) is False
+
+    @pytest.mark.asyncio
+    async def test_enqueue_drops_when_ring_full(self, transport):
+        transport.config.client_queue_size = 2
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        assert await transport.send_message("client_1", {"id": 1}) is True
+        assert await transport.send_message("client_1", {"id": 2}) is True
+        assert await transport.send_message("client_1", {"id": 3}) is False
+        assert len(client.queue) == 2
+        assert client.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_close_bypasses_ring_bound(self, transport):
+        transport.config.client_queue_size = 1
+        client = SSEClient(client_id="client_1", response=None)
+        transport.clients["client_1"] = client
+        await transport.send_message("client_1", {"id": 1})
+        await transport._close_client("client_1")
+        assert client.queue[-1] == ("close", None)
+        assert client.has_data.is_set()
+
+
+# =========================================================================
+# HTTP Endpoints
+# =========================================================================
+
+
+class TestHealthEndpoint:
+    """Tests for GET /health."""
+
+    @pytest.mark.asyncio
+    async def test_health_ok(self, http_client):
+        resp = await http_client.get("/health")
+        assert resp.status == 200
+        body = await resp.json()
+        assert body["status"] == "healthy"
+        assert body["transport"] == "sse"
+        assert body["running"] is True
+
+    @pytest.mark.asyncio
+    async def test_health_exempt_from_mcp_validation(self, http_client):
+        # The validation middleware only guards /mcp; probes with foreign
+        # origins or no protocol version must still reach /health
+        resp = await http_client.get(
+            "/health", headers={"Origin": "http://evil.com"}
+        )
+        assert resp.status == 200
+
+    @pytest.mark.asyncio
+    async def test_health_tracks_client_count(self, http_client, echo_transport):
+        first = await (await http_client.get("/health")).json()
+        assert first["clients"] == 0
+        echo_transport.clients["client_1"] = SSEClient(
+            client_id="client_1", response=None
+        )
+        second = await (await http_client.get("/health")).json()
+        assert second["clients"] == 1
+        del echo_transport.clients["client_1"]
+
+
+class TestStatsEndpoint:
+    """Tests for GET /stats."""
+
+    @pytest.mark.asyncio
+    async def test_stats_shape(self, http_client):
+        resp = await http_client.get("/stats")
+        assert resp.status == 200
+        body = await resp.json()
+        for key in (
+            "messages_sent",
+            "messages_received",
+            "clients_connected",
+            "errors",
+            "active_clients",
+            "active_sessions",
+        ):
+            assert key in body
+
+
+class TestPostEndpoint:
+    """Tests for POST /mcp."""
+
+    @pytest.mark.asyncio
+    async def test_invalid_origin_rejected(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            headers={"Origin": "http://evil.com"},
+        )
+        assert resp.status == 403
+
+    @pytest.mark.asyncio
+    async def test_unsupported_protocol_version_rejected(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            headers={"MCP-Protocol-Version": "1999-01-01"},
+        )
+        assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_rejected(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            data=b"not json",
+            headers={"Content-Type": "application/json"},
+        )
+        assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_invalid_message_rejected(self, http_client):
+        resp = await http_client.post("/mcp", json={"jsonrpc": "2.0"})
+        assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_rejected(self, http_client):
+        resp = await http_client.post("/mcp", json=[])
+        assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_oversized_batch_rejected(self, http_client, echo_transport):
+        batch = [
+            {"jsonrpc": "2.0", "id": n, "method": "tools/list"}
+            for n in range(echo_transport.config.max_batch_size + 1)
+        ]
+        resp = await http_client.post("/mcp", json=batch)
+        assert resp.status == 413
+
+    @pytest.mark.asyncio
+    async def test_batch_at_limit_accepted(self, http_client, echo_transport):
+        echo_transport.config.max_batch_size = 3
+        batch = [
+            {"jsonrpc": "2.0", "id": n, "method": "tools/list"} for n in range(3)
+        ]
+        resp = await http_client.post("/mcp", json=batch)
+        assert resp.status == 200
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_rejected(self, http_client):
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "x" * (2 * 1024 * 1024)}
+        resp = await http_client.post("/mcp", json=payload)
+        assert resp.status == 413
+
+    @pytest.mark.asyncio
+    async def test_request_gets_response(self, http_client):
+        resp = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        )
+        assert resp.status == 200
+        body = await resp.json()
+        assert body["result"] == {"echo": "tools/list"}
+
+    @pytest.mark.asyncio
+    async def test_notification_gets_202(self, http_client):
+        resp = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "method": "notifications/initialized"}
+        )
+        assert resp.status == 202
+
+    @pytest.mark.asyncio
+    async def test_response_gets_202(self, http_client):
+        resp = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "result": {}}
+        )
+        assert resp.status == 202
+
+    @pytest.mark.asyncio
+    async def test_mixed_batch_without_requests_gets_202(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            json=[
+                {"jsonrpc": "2.0", "method": "notifications/progress"},
+                {"jsonrpc": "2.0", "id": 1, "result": {}},
+            ],
+        )
+        assert resp.status == 202
+
+    @pytest.mark.asyncio
+    async def test_initialize_creates_session(self, http_client, echo_transport):
+        resp = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+        )
+        assert resp.status == 200
+        session_id = resp.headers.get("Mcp-Session-Id")
+        assert session_id is not None
+        assert session_id in echo_transport.sessions
+
+    @pytest.mark.asyncio
+    async def test_unknown_session_rejected(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            headers={"Mcp-Session-Id": "no-such-session"},
+        )
+        assert resp.status == 404
+
+    @pytest.mark.asyncio
+    async def test_known_session_accepted(self, http_client, echo_transport):
+        init = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+        )
+        session_id = init.headers["Mcp-Session-Id"]
+        resp = await http_client.post(
+            "/mcp",
+            json={"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+            headers={"Mcp-Session-Id": session_id},
+        )
+        assert resp.status == 200
+
+    @pytest.mark.asyncio
+    async def test_batch_of_requests(self, http_client):
+        resp = await http_client.post(
+            "/mcp",
+            json=[
+                {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                {"jsonrpc": "2.0", "id": 2, "method": "resources/list"},
+            ],
+        )
+        assert resp.status == 200
+        body = await resp.json()
+        assert isinstance(body, list)
+        assert len(body) == 2
+
+    @pytest.mark.asyncio
+    async def test_stats_track_received(self, http_client, echo_transport):
+        await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        )
+        assert echo_transport.stats["messages_received"] == 1
+
+
+class TestDeleteEndpoint:
+    """Tests for DELETE /mcp session teardown."""
+
+    @pytest.mark.asyncio
+    async def test_delete_known_session(self, http_client, echo_transport):
+        init = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+        )
+        session_id = init.headers["Mcp-Session-Id"]
+        resp = await http_client.delete(
+            "/mcp", headers={"Mcp-Session-Id": session_id}
+        )
+        assert resp.status == 204
+        assert session_id not in echo_transport.sessions
+
+    @pytest.mark.asyncio
+    async def test_delete_drops_event_history(self, http_client, echo_transport):
+        init = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+        )
+        session_id = init.headers["Mcp-Session-Id"]
+        echo_transport._store_event(session_id, "1", b"{}")
+        resp = await http_client.delete(
+            "/mcp", headers={"Mcp-Session-Id": session_id}
+        )
+        assert resp.status == 204
+        assert session_id not in echo_transport.event_history
+
+    @pytest.mark.asyncio
+    async def test_delete_unknown_session(self, http_client):
+        resp = await http_client.delete(
+            "/mcp", headers={"Mcp-Session-Id": "no-such-session"}
+        )
+        assert resp.status == 404
+
+    @pytest.mark.asyncio
+    async def test_delete_missing_header(self, http_client):
+        resp = await http_client.delete("/mcp")
+        assert resp.status == 404
+
+
+# =========================================================================
+# SSE Streaming
+# =========================================================================
+
+
+async def read_sse_event(resp):
+    """Read one SSE frame and parse it into a dict of fields."""
+    raw = await asyncio.wait_for(resp.content.readuntil(b"\n\n"), timeout=5.0)
+    fields = {}
+    for line in raw.decode("utf-8").strip().split("\n"):
+        key, _, value = line.partition(": ")
+        fields[key] = value
+    return fields
+
+
+class TestSSEStream:
+    """Tests for the GET /mcp event stream."""
+
+    @pytest.mark.asyncio
+    async def test_invalid_origin_rejected(self, http_client):
+        resp = await http_client.get(
+            "/mcp", headers={"Origin": "http://evil.com"}
+        )
+        assert resp.status == 403
+
+    @pytest.mark.asyncio
+    async def test_connected_event_sent(self, http_client, echo_transport):
+        resp = await http_client.get("/mcp")
+        assert resp.status == 200
+        assert resp.headers["Content-Type"].startswith("text/event-stream")
+        event = await read_sse_event(resp)
+        assert event["event"] == "connected"
+        client_id = json.loads(event["data"])["client_id"]
+        assert client_id in echo_transport.clients
+        await echo_transport._close_client(client_id)
+
+    @pytest.mark.asyncio
+    async def test_message_delivered_on_stream(self, http_client, echo_transport):
+        resp = await http_client.get("/mcp")
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        await echo_transport.send_message(client_id, {"hello": "world"})
+        event = await read_sse_event(resp)
+        assert event["event"] == "message"
+        assert json.loads(event["data"]) == {"hello": "world"}
+        await echo_transport._close_client(client_id)
+
+    @pytest.mark.asyncio
+    async def test_batch_delivered_on_stream(self, http_client, echo_transport):
+        resp = await http_client.get("/mcp")
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        await echo_transport.send_batch(client_id, [{"n": 1}, {"n": 2}])
+        event = await read_sse_event(resp)
+        assert event["event"] == "batch"
+        assert json.loads(event["data"]) == [{"n": 1}, {"n": 2}]
+        # Batch frames are not replayable, so they must not advance the
+        # client's Last-Event-ID
+        assert "id" not in event
+        await echo_transport._close_client(client_id)
+
+    @pytest.mark.asyncio
+    async def test_large_batch_streams_intact(self, http_client, echo_transport):
+        resp = await http_client.get("/mcp")
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        # Large enough to cross several drain intervals
+        messages = [{"n": n} for n in range(100)]
+        await echo_transport.send_batch(client_id, messages)
+        event = await read_sse_event(resp)
+        assert event["event"] == "batch"
+        assert json.loads(event["data"]) == messages
+        await echo_transport._close_client(client_id)
+
+    @pytest.mark.asyncio
+    async def test_ping_delivered_on_stream(self, http_client, echo_transport):
+        resp = await http_client.get("/mcp")
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        echo_transport._enqueue(echo_transport.clients[client_id], ("ping", 123.0))
+        event = await read_sse_event(resp)
+        assert event["event"] == "ping"
+        assert json.loads(event["data"]) == {"timestamp": 123.0}
+        # Control frames carry no id and never enter the replay window
+        assert "id" not in event
+        assert client_id not in echo_transport.event_history
+        await echo_transport._close_client(client_id)
+
+    @pytest.mark.asyncio
+    async def test_replay_after_reconnect(self, http_client, echo_transport):
+        # Resumption is keyed by session, so establish one first
+        init = await http_client.post(
+            "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+        )
+        session = init.headers["Mcp-Session-Id"]
+
+        resp = await http_client.get(
+            "/mcp", headers={"Mcp-Session-Id": session}
+        )
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        for n in range(3):
+            await echo_transport.send_message(client_id, {"seq": n})
+        events = [await read_sse_event(resp) for _ in range(3)]
+        await echo_transport._close_client(client_id)
+
+        # Resume from the first message event; the rest replays with the
+        # original IDs, then the new connected frame follows
+        resumed = await http_client.get(
+            "/mcp",
+            headers={
+                "Mcp-Session-Id": session,
+                "Last-Event-ID": events[0]["id"],
+            },
+        )
+        replayed = [await read_sse_event(resumed) for _ in range(2)]
+        assert [json.loads(e["data"]) for e in replayed] == [
+            {"seq": 1},
+            {"seq": 2},
+        ]
+        assert [e["id"] for e in replayed] == [events[1]["id"], events[2]["id"]]
+        connected = await read_sse_event(resumed)
+        assert connected["event"] == "connected"
+        new_client_id = json.loads(connected["data"])["client_id"]
+        await echo_transport._close_client(new_client_id)
+
+    @pytest.mark.asyncio
+    async def test_sessionless_history_dropped_on_disconnect(
+        self, http_client, echo_transport
+    ):
+        resp = await http_client.get("/mcp")
+        event = await read_sse_event(resp)
+        client_id = json.loads(event["data"])["client_id"]
+
+        await echo_transport.send_message(client_id, {"seq": 1})
+        await read_sse_event(resp)
+        assert client_id in echo_transport.event_history
+
+        # A sessionless reconnect gets a fresh client_id, so the history
+        # must not outlive the stream
+        await echo_transport._close_client(client_id)
+        await asyncio.wait_for(resp.content.read(), timeout=5.0)
+        assert client_id not in echo_transport.event_history
+
+    @pytest.mark.asyncio
+    async def test_connection_limit_enforced(self, echo_transport, http_client):
+        echo_transport.config.max_connections = 0
+        resp = await http_client.get("/mcp")
+        assert resp.status == 503